@@ -1,17 +1,110 @@
+from datetime import datetime
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Count, Exists, OuterRef
 from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from openpyxl import Workbook
 from import_export.admin import ImportExportModelAdmin
 from nested_admin.nested import NestedTabularInline, NestedModelAdmin
 
-from blog.models import BlogPost, BlogPostImage, BannerImage, BlogPostImageDescription
+from blog.models import BlogPost, BlogPostImage, BannerImage, BlogPostImageDescription, Author
 from adminsortable2.admin import SortableAdminMixin, SortableInlineAdminMixin
 
 from blog.resources import BlogPostResource
 
 
+class AnnotatedPaginator(Paginator):
+    """Paginator that computes `annotations` only for the objects on the requested page"""
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, annotations=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.annotations = annotations or {}
+
+    def page(self, number):
+        page = super().page(number)
+        if self.annotations:
+            objects = list(page.object_list)
+            # values('pk') before annotate() groups by the pk alone, not by every column including text
+            rows = self.object_list.model._default_manager.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).order_by().values('pk').annotate(**self.annotations)
+            values = {row['pk']: row for row in rows}
+            for obj in objects:
+                # a row deleted since the page was read gets the value of an empty aggregate
+                row = values.get(obj.pk, {})
+                for name, expression in self.annotations.items():
+                    empty = expression.empty_result_set_value
+                    setattr(obj, name, row.get(name, None if empty is NotImplemented else empty))
+            page.object_list = objects
+        return page
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the size of an unfiltered PostgreSQL table from the planner statistics"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                # regclass resolves the name through search_path, unlike a relname match across schemas
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been vacuumed or analyzed
+            if row and row[0] > 0:
+                return row[0]
+        return super().count
+
+
+class BlogPostPaginator(EstimatedCountPaginator, AnnotatedPaginator):
+    pass
+
+
+class AdminAnnotatedPageMixin:
+    """Adds `annotations` to the changelist results without annotating the whole table"""
+    annotations = {}
+    paginator = AnnotatedPaginator
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, annotations=self.annotations)
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super().get_changelist(request, **kwargs)
+        annotations = self.annotations
+
+        class AnnotatedChangeList(changelist):
+            def get_results(self, request):
+                super().get_results(request)
+                # a single page or "show all" skips the paginator and returns a queryset
+                if annotations and not isinstance(self.result_list, list):
+                    self.result_list = self.result_list.annotate(**annotations)
+
+        return AnnotatedChangeList
+
+
 @admin.register(BannerImage)
 class BannerImageAdmin(admin.ModelAdmin):
     raw_id_fields = ('blog_post',)
+    list_select_related = ('blog_post',)
+
+    def get_queryset(self, request):
+        # __str__ only needs the post title, so keep the post text out of the join
+        return super().get_queryset(request).select_related('blog_post').defer('blog_post__text')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'blog_post':
+            # the raw id field only validates the submitted post, which needs just its id and title
+            kwargs['queryset'] = BlogPost.objects.only('id', 'title')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 # @admin.register(Author)
@@ -23,6 +116,15 @@ class MembershipInline(admin.TabularInline):
     model = BlogPost.authors.through
     extra = 1
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'author':
+            kwargs['queryset'] = Author.objects.only('id', 'first_name', 'last_name')
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'author':
+            # every inline row shares this formfield, so evaluate the dropdown choices once
+            formfield.choices = list(formfield.choices)
+        return formfield
+
 #
 # class BlogPostImageInline(SortableInlineAdminMixin, admin.StackedInline):
 #     model = BlogPostImage
@@ -62,21 +164,62 @@ class BlogPostImageInline(NestedTabularInline):
 #         return qs.filter(active=True)
 
 
-class BlogPostAdmin(ImportExportModelAdmin):
+class BlogPostAdmin(AdminAnnotatedPageMixin, ImportExportModelAdmin):
     # inlines = [MembershipInline, BlogPostImageInline]
     resource_class = BlogPostResource
-    list_display = ('title', 'active', 'deleted')
+    list_display = ('title', 'active', 'deleted', 'image_count', 'has_banner')
+    list_per_page = 50
+    show_full_result_count = False
+    paginator = BlogPostPaginator
+    annotations = {
+        'image_count': Count('images'),
+        'has_banner': Exists(BannerImage.objects.filter(blog_post=OuterRef('pk'))),
+    }
     actions = ['export_selected']
 
+    def get_changelist(self, request, **kwargs):
+        changelist = super().get_changelist(request, **kwargs)
+
+        class BlogPostChangeList(changelist):
+            def get_queryset(self, request, *args, **kwargs):
+                # the changelist only renders list_display, so skip the text and file columns
+                return super().get_queryset(request, *args, **kwargs).only(
+                    'id', 'title', 'active', 'deleted', 'create_date')
+
+        return BlogPostChangeList
+
+    @admin.display(description='Images')
+    def image_count(self, obj):
+        return obj.image_count
+
+    @admin.display(description='Banner', boolean=True)
+    def has_banner(self, obj):
+        return obj.has_banner
+
     def export_selected(self, request, queryset):
-        """Custom export action"""
-        resource = BlogPostResource()
-        dataset = resource.export(queryset)
+        """Custom export action, written row by row so large selections are never fully in memory"""
+        fields = BlogPostResource._meta.fields
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(fields)
+        blog_posts = queryset.select_related(None).only(*fields)
+        # on PostgreSQL iterator() reads through a server-side cursor, which needs a transaction
+        # when connections go through a transaction-pooling proxy such as pgbouncer
+        with transaction.atomic(using=blog_posts.db):
+            for blog_post in blog_posts.iterator(chunk_size=2000):
+                row = []
+                for field in fields:
+                    value = getattr(blog_post, field)
+                    if isinstance(value, datetime) and timezone.is_aware(value):
+                        # excel does not support timezones
+                        value = timezone.localtime(value).replace(tzinfo=None)
+                    row.append(value)
+                sheet.append(row)
         response = HttpResponse(
-            dataset.export('xlsx'),
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
         response['Content-Disposition'] = 'attachment; filename="books.xlsx"'
+        workbook.save(response)
         return response
 
 
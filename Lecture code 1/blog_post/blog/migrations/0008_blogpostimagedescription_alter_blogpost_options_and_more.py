@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-15 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_author_birth_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostImageDescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Text')),
+            ],
+            options={
+                'verbose_name': 'Blog Post Image Description',
+                'verbose_name_plural': 'Blog Post Image  Descriptions',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='blogpost',
+            options={'ordering': ['order'], 'verbose_name': 'Blog Post', 'verbose_name_plural': 'Blog Posts'},
+        ),
+        migrations.AlterModelOptions(
+            name='blogpostimage',
+            options={'ordering': ['order'], 'verbose_name': 'Blog Post Image', 'verbose_name_plural': 'Blog Post Images'},
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blogpostimage',
+            name='order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['title'], name='blog_blogpo_title_2aa4d1_idx'),
+        ),
+        migrations.AddField(
+            model_name='blogpostimagedescription',
+            name='blog_post_image',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descriptions', to='blog.blogpostimage', verbose_name='Blog Post Image'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-15 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_blogpostimagedescription_alter_blogpost_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['order'], name='blog_blogpo_order_91d4ed_idx'),
+        ),
+    ]
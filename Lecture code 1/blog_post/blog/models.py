@@ -1,3 +1,4 @@
+import hashlib
 from datetime import date
 from django.db import models
 
@@ -15,11 +16,13 @@ class Author(models.Model):
     @property
     def age(self) -> int:
         today = date.today()
-        return today.year - self.birth_date.year - (
-                (today.month, today.day) < (self.birth_date.month, self.birth_date.day)
-        )
+        # month * 32 + day orders (month, day) pairs without building tuples
+        today_key = today.month * 32 + today.day
+        birth_key = self.birth_date.month * 32 + self.birth_date.day
+        return today.year - self.birth_date.year - (today_key < birth_key)
 
     def get_blog_posts(self):
+        """Uses the prefetch cache when the queryset has prefetch_related('blog_posts')"""
         return self.blog_posts.all()
 
     class Meta:
@@ -45,15 +48,42 @@ class BlogPost(models.Model):
     document = models.FileField(upload_to='blog_document/', null=True, blank=True)
     deleted = models.BooleanField(verbose_name='წაშლილია', default=False)
     order = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=64, editable=False)
+
+    def get_content_hash(self) -> str:
+        return hashlib.sha256(f'{self.title}\x1f{self.text}'.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.get_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'text'} & set(update_fields):
+            # a partial save that changes the content has to write the new hash with it
+            kwargs['update_fields'] = {*update_fields, 'content_hash'}
+        super().save(*args, **kwargs)
+
+    def validate_constraints(self, exclude=None):
+        # content_hash is not a form field, so refresh it and make sure the uniqueness check runs
+        self.content_hash = self.get_content_hash()
+        if exclude is not None:
+            exclude = set(exclude) - {'content_hash'}
+        super().validate_constraints(exclude=exclude)
 
     def get_images(self):
-        return BlogPostImage.objects.filter(blog_post=self.id)
+        """Uses the prefetch cache when the queryset has prefetch_related('images')"""
+        return self.images.all()
 
     class Meta:
         verbose_name = "Blog Post"
         verbose_name_plural = "Blog Posts"
         ordering = ['order']
-        unique_together = [['title', 'text']]
+        indexes = [models.Index(fields=['title']), models.Index(fields=['order', '-id'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_hash'],
+                name='uniq_blog_content',
+                violation_error_message='Blog Post with this Title and Text already exists.',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,4 +1,6 @@
+from django.utils import timezone
 from import_export import resources
+from import_export.instance_loaders import CachedInstanceLoader
 from blog.models import BlogPost
 
 
@@ -7,3 +9,27 @@ class BlogPostResource(resources.ModelResource):
         model = BlogPost
         # Optional: Control which fields are included
         fields = ('id', 'title', 'text', 'create_date')
+        chunk_size = 10000
+        # imports are written with bulk_create/bulk_update instead of a save() per row
+        use_bulk = True
+        batch_size = 10000
+        skip_diff = True
+        # existing rows are looked up with a single id__in query instead of one per row
+        instance_loader_class = CachedInstanceLoader
+
+    def export(self, queryset=None, **kwargs):
+        """Exports plain value rows instead of instantiating a BlogPost for every row"""
+        if queryset is None:
+            queryset = self.get_queryset()
+        queryset = queryset.prefetch_related(None).values(*self._meta.fields)
+        return super().export(queryset, **kwargs)
+
+    def before_save_instance(self, instance, row, **kwargs):
+        # bulk_create/bulk_update skip BlogPost.save(), which is where the hash is normally set
+        instance.content_hash = instance.get_content_hash()
+        # bulk_update also skips the auto_now pre_save, so refresh the timestamp here
+        if not instance._state.adding:
+            instance.update_date = timezone.now()
+
+    def get_bulk_update_fields(self):
+        return super().get_bulk_update_fields() + ['content_hash', 'update_date']
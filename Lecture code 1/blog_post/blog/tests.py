@@ -1,3 +1,343 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import tablib
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.forms import modelform_factory
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from import_export import resources
+from openpyxl import load_workbook
+
+from blog.admin import AnnotatedPaginator, BlogPostAdmin, EstimatedCountPaginator
+from blog.models import Author, BannerImage, BlogPost, BlogPostImage
+from blog.resources import BlogPostResource
+
+
+class ContentHashTests(TestCase):
+    def test_hash_is_set_on_save(self):
+        blog_post = BlogPost.objects.create(title='Title', text='Text')
+        self.assertEqual(len(blog_post.content_hash), 64)
+        self.assertEqual(blog_post.content_hash, blog_post.get_content_hash())
+
+    def test_hash_follows_title_and_text(self):
+        blog_post = BlogPost.objects.create(title='Title', text='Text')
+        old_hash = blog_post.content_hash
+        blog_post.text = 'Other text'
+        blog_post.save()
+        self.assertNotEqual(blog_post.content_hash, old_hash)
+
+    def test_partial_save_updates_hash(self):
+        blog_post = BlogPost.objects.create(title='Title', text='Text')
+        blog_post.title = 'New title'
+        blog_post.save(update_fields=['title'])
+        blog_post.refresh_from_db()
+        self.assertEqual(blog_post.content_hash, blog_post.get_content_hash())
+        with self.assertRaises(IntegrityError):
+            BlogPost.objects.create(title='New title', text='Text')
+
+    def test_partial_save_of_other_fields_leaves_hash_alone(self):
+        blog_post = BlogPost.objects.create(title='Title', text='Text')
+        with CaptureQueriesContext(connection) as queries:
+            blog_post.save(update_fields=['order'])
+        self.assertNotIn('content_hash', queries[0]['sql'])
+
+    def test_duplicate_content_is_rejected_by_the_database(self):
+        BlogPost.objects.create(title='Title', text='Text')
+        with self.assertRaises(IntegrityError):
+            BlogPost.objects.create(title='Title', text='Text')
+
+    def test_duplicate_content_is_a_form_error(self):
+        BlogPost.objects.create(title='Title', text='Text')
+        form_class = modelform_factory(BlogPost, fields=['title', 'text'])
+        form = form_class(data={'title': 'Title', 'text': 'Text'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ['Blog Post with this Title and Text already exists.'])
+        self.assertTrue(form_class(data={'title': 'Title', 'text': 'New text'}).is_valid())
+
+
+class ContentHashMigrationTests(TransactionTestCase):
+    migrate_from = [('blog', '0009_blogpost_blog_blogpo_order_91d4ed_idx')]
+    migrate_to = [('blog', '0010_blogpost_content_hash')]
+
+    def test_existing_rows_are_backfilled(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldBlogPost = old_apps.get_model('blog', 'BlogPost')
+        # more rows than one backfill batch
+        OldBlogPost.objects.bulk_create(
+            OldBlogPost(title='Same title', text=f'Text {i}') for i in range(1500))
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        new_apps = executor.loader.project_state(self.migrate_to).apps
+        blog_posts = new_apps.get_model('blog', 'BlogPost').objects.order_by('id')
+
+        expected = [BlogPost(title=b.title, text=b.text).get_content_hash() for b in blog_posts]
+        self.assertEqual([b.content_hash for b in blog_posts], expected)
+        self.assertEqual(len(set(expected)), 1500)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class AnnotatedPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.blog_posts = [BlogPost.objects.create(title=f'Post {i}', text='Text') for i in range(3)]
+        for _ in range(2):
+            BlogPostImage.objects.create(blog_post=cls.blog_posts[0], image='image.png')
+        BannerImage.objects.create(blog_post=cls.blog_posts[1])
+
+    def test_page_is_annotated(self):
+        paginator = AnnotatedPaginator(
+            BlogPost.objects.order_by('id'), 2, annotations=BlogPostAdmin.annotations)
+        # count, page rows, annotations for the page
+        with self.assertNumQueries(3):
+            page = paginator.page(1)
+        self.assertEqual([obj.image_count for obj in page], [2, 0])
+        self.assertEqual([obj.has_banner for obj in page], [False, True])
+
+    def test_row_deleted_before_annotation_gets_empty_values(self):
+        deleted = self.blog_posts[0]
+
+        class DeletingPaginator(AnnotatedPaginator):
+            def _get_page(self, object_list, *args, **kwargs):
+                object_list = list(object_list)
+                BlogPost.objects.filter(pk=deleted.pk).delete()
+                return super()._get_page(object_list, *args, **kwargs)
+
+        paginator = DeletingPaginator(
+            BlogPost.objects.order_by('id'), 2, annotations=BlogPostAdmin.annotations)
+        page = paginator.page(1)
+        self.assertEqual(page[0].pk, deleted.pk)
+        self.assertEqual(page[0].image_count, 0)
+        self.assertIs(page[0].has_banner, False)
+
+    def test_without_annotations(self):
+        paginator = AnnotatedPaginator(BlogPost.objects.order_by('id'), 2)
+        self.assertEqual(list(paginator.page(2)), [self.blog_posts[2]])
+
+
+class BlogPostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.blog_posts = []
+        for i in range(60):
+            blog_post = BlogPost.objects.create(title=f'Post {i}', text='Text')
+            BlogPostImage.objects.create(blog_post=blog_post, image='image.png')
+            cls.blog_posts.append(blog_post)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_changelist_query_count(self):
+        # session, user, count, page rows, annotations for the page
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('admin:blog_blogpost_changelist'))
+        results = response.context['cl'].result_list
+        self.assertEqual(len(results), BlogPostAdmin.list_per_page)
+        self.assertTrue(all(obj.image_count == 1 for obj in results))
+
+    def test_changelist_skips_unlisted_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:blog_blogpost_changelist'))
+        self.assertFalse([q for q in queries if '"blog_blogpost"."text"' in q['sql']])
+
+    def test_export_keeps_all_resource_columns(self):
+        response = self.client.post(reverse('admin:blog_blogpost_export'), {
+            'format': '0',
+            'resource': '0',
+            'blogpostresource_id': 'on',
+            'blogpostresource_text': 'on',
+        })
+        self.assertEqual(response.content.decode().splitlines()[:2], ['id,text', f'{self.blog_posts[-1].pk},Text'])
+
+    def test_show_all_changelist_is_annotated(self):
+        # "show all" skips the paginator, so the annotations go on the queryset itself
+        response = self.client.get(reverse('admin:blog_blogpost_changelist'), {'all': ''})
+        results = response.context['cl'].result_list
+        self.assertEqual(len(results), 60)
+        self.assertTrue(all(obj.image_count == 1 for obj in results))
+
+
+class ExportSelectedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.blog_post = BlogPost.objects.create(title='Title', text='Text')
+        BlogPost.objects.create(title='Not selected', text='Text')
+
+    def export(self, pks):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('admin:blog_blogpost_changelist'), {
+            'action': 'export_selected',
+            ACTION_CHECKBOX_NAME: pks,
+        })
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="books.xlsx"')
+        return list(load_workbook(BytesIO(response.content)).active.values)
+
+    def test_rows_follow_resource_fields(self):
+        rows = self.export([self.blog_post.pk])
+        self.assertEqual(rows[0], BlogPostResource._meta.fields)
+        create_date = timezone.localtime(self.blog_post.create_date).replace(tzinfo=None)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:3], (self.blog_post.pk, 'Title', 'Text'))
+        # excel keeps millisecond precision
+        self.assertAlmostEqual(rows[1][3], create_date, delta=timedelta(milliseconds=1))
+
+
+class ExportSelectedChunkTests(TestCase):
+    def test_export_spans_iterator_chunks(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        blog_posts = [BlogPost(title=f'Post {i}', text='Text') for i in range(2500)]
+        for blog_post in blog_posts:
+            blog_post.content_hash = blog_post.get_content_hash()
+        BlogPost.objects.bulk_create(blog_posts)
+        self.client.force_login(user)
+        response = self.client.post(reverse('admin:blog_blogpost_changelist'), {
+            'action': 'export_selected',
+            # "select all" instead of one checkbox per row, which would exceed DATA_UPLOAD_MAX_NUMBER_FIELDS
+            'select_across': '1',
+            ACTION_CHECKBOX_NAME: [BlogPost.objects.first().pk],
+        })
+        rows = list(load_workbook(BytesIO(response.content), read_only=True).active.values)
+        # header plus every post, across the 2000-row iterator chunks
+        self.assertEqual(len(rows), 2501)
+        self.assertEqual({row[1] for row in rows[1:]}, {f'Post {i}' for i in range(2500)})
+
+
+class BannerImageAdminTests(TestCase):
+    def test_changelist_leaves_post_text_out_of_the_join(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        for i in range(3):
+            BannerImage.objects.create(blog_post=BlogPost.objects.create(title=f'Post {i}', text='Text'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:blog_bannerimage_changelist'))
+        self.assertContains(response, 'Post 2')
+        self.assertFalse([q for q in queries if '"blog_blogpost"."text"' in q['sql']])
+
+
+class BlogPostResourceTests(TestCase):
+    def test_import_updates_hash_and_update_date(self):
+        blog_post = BlogPost.objects.create(title='Title', text='Text')
+        old_date = blog_post.update_date - timedelta(days=1)
+        BlogPost.objects.filter(pk=blog_post.pk).update(update_date=old_date)
+
+        dataset = tablib.Dataset(headers=['id', 'title', 'text'])
+        dataset.append([blog_post.pk, 'New title', 'Text'])
+        dataset.append(['', 'Imported', 'Text'])
+        result = BlogPostResource().import_data(dataset, raise_errors=True)
+
+        self.assertFalse(result.has_errors())
+        blog_post.refresh_from_db()
+        self.assertEqual(blog_post.title, 'New title')
+        self.assertEqual(blog_post.content_hash, blog_post.get_content_hash())
+        self.assertGreater(blog_post.update_date, old_date)
+        imported = BlogPost.objects.get(title='Imported')
+        self.assertEqual(imported.content_hash, imported.get_content_hash())
+
+    def test_import_does_not_query_per_row(self):
+        blog_posts = [BlogPost.objects.create(title=f'Title {i}', text='Text') for i in range(100)]
+        dataset = tablib.Dataset(headers=['id', 'title', 'text'])
+        for blog_post in blog_posts:
+            dataset.append([blog_post.pk, f'{blog_post.title} updated', 'Text'])
+        for i in range(100):
+            dataset.append(['', f'New {i}', 'Text'])
+        with CaptureQueriesContext(connection) as queries:
+            BlogPostResource().import_data(dataset, raise_errors=True)
+        # one id__in lookup plus batched writes, whatever the number of rows
+        self.assertLess(len(queries), 20)
+        self.assertEqual(BlogPost.objects.filter(title__endswith=' updated').count(), 100)
+        self.assertEqual(BlogPost.objects.count(), 200)
+
+
+class BlogPostExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            BlogPost.objects.create(title=f'Post {i}', text=f'Text {i}')
+
+    def test_export_reads_value_rows_in_one_query(self):
+        queryset = BlogPost.objects.order_by('pk')
+        with self.assertNumQueries(1):
+            dataset = BlogPostResource().export(queryset)
+        self.assertEqual(dataset.headers, list(BlogPostResource._meta.fields))
+        self.assertEqual(dataset['title'], ['Post 0', 'Post 1', 'Post 2'])
+
+    def test_value_rows_export_like_instances(self):
+        queryset = BlogPost.objects.order_by('pk')
+        # the stock ModelResource.export reads model instances
+        from_instances = resources.ModelResource.export(BlogPostResource(), queryset)
+        self.assertEqual(BlogPostResource().export(queryset).dict, from_instances.dict)
+
+
+class ChangelistOrderIndexTests(TestCase):
+    @skipUnless(connection.vendor == 'sqlite', 'reads the SQLite query plan')
+    def test_changelist_order_needs_no_sort(self):
+        # ChangeList adds -pk after Meta.ordering to make the order total
+        queryset = BlogPost.objects.order_by('order', '-pk')[:50]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX blog_blogpo_order_ef7020_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class AuthorAgePropertyTests(TestCase):
+    def test_packed_comparison_matches_tuple_comparison(self):
+        birth_dates = [date(2000, 1, 1) + timedelta(days=i) for i in range(366)]
+        for today in (date(2026, 1, 1), date(2026, 2, 28), date(2028, 2, 29), date(2026, 12, 31)):
+            with mock.patch('blog.models.date', wraps=date) as mocked_date:
+                mocked_date.today.return_value = today
+                for birth_date in birth_dates:
+                    expected = today.year - birth_date.year - (
+                        (today.month, today.day) < (birth_date.month, birth_date.day))
+                    self.assertEqual(Author(birth_date=birth_date).age, expected, (today, birth_date))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            BlogPost.objects.create(title=f'Post {i}', text='Text')
+
+    def test_count_falls_back_outside_postgresql(self):
+        paginator = EstimatedCountPaginator(BlogPost.objects.all(), 2)
+        self.assertEqual(paginator.count, 3)
+
+    def mock_postgresql(self, reltuples):
+        connections = mock.MagicMock()
+        db = connections.__getitem__.return_value
+        db.vendor = 'postgresql'
+        db.cursor.return_value.__enter__.return_value.fetchone.return_value = (reltuples,)
+        return mock.patch('blog.admin.connections', connections)
+
+    def test_unfiltered_count_uses_planner_estimate(self):
+        with self.mock_postgresql(1000) as connections, self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(BlogPost.objects.all(), 2).count, 1000)
+        cursor = connections['default'].cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connections['default'].ops.quote_name.return_value],
+        )
+        connections['default'].ops.quote_name.assert_called_once_with('blog_blogpost')
+
+    def test_filtered_count_is_exact(self):
+        with self.mock_postgresql(1000):
+            self.assertEqual(EstimatedCountPaginator(BlogPost.objects.filter(text='Text'), 2).count, 3)
+
+    def test_unanalyzed_table_is_counted(self):
+        with self.mock_postgresql(-1):
+            self.assertEqual(EstimatedCountPaginator(BlogPost.objects.all(), 2).count, 3)
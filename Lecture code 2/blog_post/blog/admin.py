@@ -1,6 +1,14 @@
+from math import ceil
+
 from django.contrib import admin
 from adminsortable2.admin import SortableAdminMixin, SortableInlineAdminMixin
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.functional import cached_property
 from import_export.admin import ImportExportModelAdmin
 from nested_admin.nested import NestedTabularInline, NestedModelAdmin
 
@@ -8,11 +16,43 @@ from blog.models import BlogPost, BlogPostImage, Author, BlogPostImageDescriptio
 from blog.resources import BlogPostResource, AuthorResource
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the size of an unfiltered PostgreSQL table from the planner statistics"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                # regclass resolves the name through search_path, unlike a relname match across schemas
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been vacuumed or analyzed
+            if row and row[0] > 0:
+                return row[0]
+        return super().count
+
+
 @admin.register(Author)
 class AuthorAdmin(ImportExportModelAdmin):
     resource_class = AuthorResource
     actions = ['export_selected']
-    list_display = ('full_name', 'age')
+    list_display = ('full_name_display', 'age_display')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_full_name_and_age()
+
+    @admin.display(description='Full name', ordering='full_name_db')
+    def full_name_display(self, obj):
+        return obj.full_name_db
+
+    @admin.display(description='Age', ordering='annotated_age')
+    def age_display(self, obj):
+        return obj.annotated_age
 
     def export_selected(self, request, queryset):
         """Custom export action"""
@@ -57,14 +97,133 @@ class BlogPostImageDescriptionInline(NestedTabularInline):
     model = BlogPostImageDescription
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'blog_post_image__blog_post').defer('blog_post_image__blog_post__text')
+
+@admin.register(BlogPostImage)
+class BlogPostImageAdmin(NestedModelAdmin):
+    inlines = [BlogPostImageDescriptionInline]
+    list_select_related = ('blog_post',)
+    raw_id_fields = ('blog_post',)
+
+    def get_queryset(self, request):
+        # __str__ only needs the post title, so keep the post text out of the join
+        return super().get_queryset(request).select_related('blog_post').defer('blog_post__text')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'blog_post':
+            # the raw id field only validates the submitted post, which needs just its id and title
+            kwargs['queryset'] = BlogPost.objects.only('id', 'title')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 class BlogPostImageInline(NestedTabularInline):
     model = BlogPostImage
-    inlines = [BlogPostImageDescriptionInline]
     extra = 1
+    per_page = 20
+    template = 'blog/admin/paginated_tabular.html'
+    readonly_fields = ('descriptions_link',)
+
+    class Media:
+        js = ('blog/js/image_descriptions.js',)
+
+    @admin.display(description='Descriptions')
+    def descriptions_link(self, obj):
+        """Descriptions are fetched from BlogPostAdmin.descriptions_json when expanded"""
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:blog_blogpost_image_descriptions', args=[obj.pk])
+        return format_html(
+            '<button type="button" class="button blog-image-descriptions" data-url="{}">Expand</button>'
+            '<div hidden></div>',
+            url,
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        """Only render one page of existing images, selected with ?inline_page=N"""
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            page = max(int(request.GET.get('inline_page', 0)), 0)
+        except ValueError:
+            page = 0
+        per_page = self.per_page
+        start = page * per_page
+        stop = start + per_page
+
+        class PaginatedFormSet(formset):
+            @cached_property
+            def total_count(self):
+                return obj.images.count() if obj is not None else 0
+
+            @cached_property
+            def page_links(self):
+                """(number, url, is_current) for every page, or nothing when one page holds them all"""
+                if self.total_count <= per_page:
+                    return []
+                links = []
+                for number in range(ceil(self.total_count / per_page)):
+                    query = request.GET.copy()
+                    query['inline_page'] = number
+                    links.append((number + 1, '?' + query.urlencode(), number == page))
+                return links
+
+            @property
+            def page_start(self):
+                return start + 1
+
+            @property
+            def page_stop(self):
+                return min(stop, self.total_count)
+
+            def get_queryset(self):
+                qs = super().get_queryset()
+                # bound formsets are already narrowed to the submitted rows
+                if not self.is_bound and not qs.query.is_sliced:
+                    # order usually ties at its default of 0, so pk keeps the pages disjoint
+                    qs = self._queryset = qs.order_by('order', 'pk')[start:stop]
+                return qs
+
+        return PaginatedFormSet
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('blog_post').defer('blog_post__text')
 
 class BlogPostAdmin(ImportExportModelAdmin, NestedModelAdmin):
     resource_class = BlogPostResource
     inlines = [BlogPostImageInline]
     list_display = ('title', 'is_active', 'created_at')
+    list_per_page = 50
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super().get_changelist(request, **kwargs)
+
+        class BlogPostChangeList(changelist):
+            def get_queryset(self, request, *args, **kwargs):
+                # the changelist only renders list_display, so skip the text, file and hash columns
+                return super().get_queryset(request, *args, **kwargs).only(
+                    'id', 'title', 'is_active', 'created_at')
+
+        return BlogPostChangeList
+
+    def get_urls(self):
+        urls = [
+            path(
+                'image/<int:pk>/descriptions/',
+                self.admin_site.admin_view(self.descriptions_json),
+                name='blog_blogpost_image_descriptions',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def descriptions_json(self, request, pk):
+        """Descriptions of one image, loaded on demand by the image inline"""
+        if not request.user.has_perm('blog.view_blogpostimagedescription'):
+            raise PermissionDenied
+        descriptions = BlogPostImageDescription.objects.filter(
+            blog_post_image=pk).order_by('pk').values('id', 'text')
+        return JsonResponse({'descriptions': list(descriptions)})
 
 admin.site.register(BlogPost, BlogPostAdmin)
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.5 on 2026-10-15 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def fill_slug(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    blog_posts = list(BlogPost.objects.only('id', 'title').order_by('id'))
+    taken = set()
+    for blog_post in blog_posts:
+        # leave room in the 50 character column for a suffix
+        base = slug = slugify(blog_post.title)[:40] or 'blog-post'
+        # existing posts may share a title, so suffix repeats to keep the column unique
+        suffix = blog_post.id
+        while slug in taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        taken.add(slug)
+        blog_post.slug = slug
+    BlogPost.objects.bulk_update(blog_posts, ['slug'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_author_birth_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostImageDescription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Text')),
+            ],
+            options={
+                'verbose_name': 'Blog Post Image Description',
+                'verbose_name_plural': 'Blog Post Image Descriptions',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='blogpost',
+            options={'ordering': ['order'], 'verbose_name': 'Blog Post', 'verbose_name_plural': 'Blog Posts'},
+        ),
+        migrations.AlterModelOptions(
+            name='blogpostimage',
+            options={'ordering': ['order'], 'verbose_name': 'Blog Post Image', 'verbose_name_plural': 'Blog Post Images'},
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='order',
+            field=models.PositiveIntegerField(default=0, verbose_name='Order'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='slug',
+            field=models.SlugField(blank=True, default='', verbose_name='Slug'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_slug, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='slug',
+            field=models.SlugField(blank=True, unique=True, verbose_name='Slug'),
+        ),
+        migrations.AddField(
+            model_name='blogpostimage',
+            name='order',
+            field=models.PositiveIntegerField(default=0, verbose_name='Order'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['title'], name='blog_blogpo_title_2aa4d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['order'], name='blog_blogpo_order_91d4ed_idx'),
+        ),
+        migrations.AddField(
+            model_name='blogpostimagedescription',
+            name='blog_post_image',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descriptions', to='blog.blogpostimage', verbose_name='Blog Post Image'),
+        ),
+    ]
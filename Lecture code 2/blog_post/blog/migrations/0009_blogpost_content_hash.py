@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-15 18:02
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_content_hash(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    # stream the posts so only one batch of texts is held in memory at a time
+    batch = []
+    for blog_post in BlogPost.objects.only('id', 'title', 'text').iterator(chunk_size=BATCH_SIZE):
+        blog_post.content_hash = hashlib.sha256(
+            f'{blog_post.title}\x1f{blog_post.text}'.encode()).hexdigest()
+        batch.append(blog_post)
+        if len(batch) == BATCH_SIZE:
+            BlogPost.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    BlogPost.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_blogpostimagedescription_alter_blogpost_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='content_hash',
+            field=models.CharField(editable=False, max_length=64),
+        ),
+        migrations.AlterUniqueTogether(
+            name='blogpost',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='blogpost',
+            constraint=models.UniqueConstraint(fields=('content_hash',), name='uniq_blog_content', violation_error_message='Blog Post with this Title and Text already exists.'),
+        ),
+    ]
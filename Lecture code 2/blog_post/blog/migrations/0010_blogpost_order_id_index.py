@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-15 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_blogpost_content_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blogpost',
+            name='blog_blogpo_order_91d4ed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['order', '-id'], name='blog_blogpo_order_ef7020_idx'),
+        ),
+    ]
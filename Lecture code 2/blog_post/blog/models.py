@@ -1,14 +1,38 @@
+import hashlib
 from datetime import date
 from django.db import models
+from django.db.models.functions import Concat, ExtractYear
 from django.utils.text import slugify
 
 
+class AuthorQuerySet(models.QuerySet):
+    def with_full_name_and_age(self):
+        """Annotates full_name_db and annotated_age, computed by the database"""
+        today = date.today()
+        birthday_not_reached = models.Q(birth_date__month__gt=today.month) | models.Q(
+            birth_date__month=today.month, birth_date__day__gt=today.day)
+        return self.annotate(
+            full_name_db=Concat('first_name', models.Value(' '), 'last_name'),
+            annotated_age=models.Value(today.year) - ExtractYear('birth_date') - models.Case(
+                models.When(birthday_not_reached, then=models.Value(1)),
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def bulk_report(self):
+        """(id, full_name, age) rows for large reports, without instantiating any Author"""
+        return self.with_full_name_and_age().values_list('id', 'full_name_db', 'annotated_age')
+
+
 class Author(models.Model):
     first_name = models.CharField(verbose_name='First name', max_length=100)
     last_name = models.CharField(verbose_name='Last name', max_length=100)
     email = models.EmailField(verbose_name='Email')
     birth_date = models.DateField(verbose_name='Birth date', null=True)
 
+    objects = AuthorQuerySet.as_manager()
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -16,9 +40,10 @@ class Author(models.Model):
     @property
     def age(self) -> int:
         today = date.today()
-        return today.year - self.birth_date.year - (
-                (today.month, today.day) < (self.birth_date.month, self.birth_date.day)
-        )
+        # month * 32 + day orders (month, day) pairs without building tuples
+        today_key = today.month * 32 + today.day
+        birth_key = self.birth_date.month * 32 + self.birth_date.day
+        return today.year - self.birth_date.year - (today_key < birth_key)
 
     class Meta:
         verbose_name = "Author"
@@ -66,20 +91,44 @@ class BlogPost(models.Model):
     website = models.URLField(verbose_name='ვებ მისამართი', null=True)
     document = models.FileField(upload_to='blog_post_documents/', null=True)
     order = models.PositiveIntegerField(verbose_name='Order', default=0)
+    content_hash = models.CharField(max_length=64, editable=False)
+
+    def get_content_hash(self) -> str:
+        return hashlib.sha256(f'{self.title}\x1f{self.text}'.encode()).hexdigest()
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.content_hash = self.get_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'text'} & set(update_fields):
+            # a partial save that changes the content has to write the new hash with it
+            kwargs['update_fields'] = {*update_fields, 'content_hash'}
         super().save(*args, **kwargs)
 
+    def validate_constraints(self, exclude=None):
+        # content_hash is not a form field, so refresh it and make sure the uniqueness check runs
+        self.content_hash = self.get_content_hash()
+        if exclude is not None:
+            exclude = set(exclude) - {'content_hash'}
+        super().validate_constraints(exclude=exclude)
+
     def get_images(self):
+        """Uses the prefetch cache when the queryset has prefetch_related('images')"""
         return self.images.all()
 
     class Meta:
         verbose_name = "Blog Post"
         verbose_name_plural = "Blog Posts"
         ordering = ['order']
-        unique_together = [['title', 'text']]
+        indexes = [models.Index(fields=['title']), models.Index(fields=['order', '-id'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_hash'],
+                name='uniq_blog_content',
+                violation_error_message='Blog Post with this Title and Text already exists.',
+            ),
+        ]
 
     def __str__(self):
         return self.title
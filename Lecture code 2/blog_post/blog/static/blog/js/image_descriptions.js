@@ -0,0 +1,36 @@
+'use strict';
+// Loads the descriptions of a blog post image when its "Expand" button is clicked.
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('.blog-image-descriptions');
+    if (!button) {
+        return;
+    }
+    const container = button.nextElementSibling;
+    if (container.dataset.loaded) {
+        container.hidden = !container.hidden;
+        return;
+    }
+    fetch(button.dataset.url, {credentials: 'same-origin'})
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status + ' ' + response.statusText);
+            }
+            return response.json();
+        })
+        .then(function(data) {
+            const list = document.createElement('ul');
+            data.descriptions.forEach(function(description) {
+                const item = document.createElement('li');
+                item.textContent = description.text;
+                list.appendChild(item);
+            });
+            container.replaceChildren(list);
+            container.dataset.loaded = 'true';
+            container.hidden = false;
+        })
+        .catch(function(error) {
+            // leave data-loaded unset so the next click retries
+            container.textContent = 'Could not load descriptions: ' + error.message;
+            container.hidden = false;
+        });
+});